@@ -0,0 +1,299 @@
+# ===============================================
+# walk_forward.py
+# Retreina e avalia o modelo em janelas móveis (walk-forward)
+# ordenadas por createdAt, em paralelo, medindo como precisão
+# e F1 decaem com a idade do modelo
+# ===============================================
+
+import os
+import time
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import precision_score, recall_score, f1_score
+from imblearn.over_sampling import SMOTE
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(BASE_DIR, "trades.csv")
+RESULTADOS_PATH = os.path.join(BASE_DIR, "walk_forward_resultados.csv")
+
+# Janelas em dias: treina em TREINO_DIAS, testa nos TESTE_DIAS seguintes
+# e avança PASSO_DIAS a cada janela
+TREINO_DIAS = 7
+TESTE_DIAS = 3
+PASSO_DIAS = 1
+# Purga antes do corte: o label (success) só é conhecido quando o trade
+# fecha, até periodoDeAlvo depois (a maioria é até "2 dias"). Linhas criadas
+# depois de corte - EMBARGO_DIAS, ou cujo próprio alvo passa do corte, não treinam
+EMBARGO_DIAS = 2
+MAX_WORKERS = os.cpu_count()
+
+# Mesmos hiperparâmetros escolhidos em train_model.py
+PARAMS_MODELO = {
+    "n_estimators": 500,
+    "max_depth": 50,
+    "min_samples_split": 2,
+    "min_samples_leaf": 1,
+    "max_features": "sqrt",
+    "criterion": "entropy",
+    "bootstrap": False,
+}
+
+CATEGORICAL_COLUMNS = ["ativo", "name", "tipo", "timeframe", "setup"]
+
+NUM_COLS = [
+    "nivelDeEntrada", "stopLoss", "nivelDeAlvo",
+    "riscoLoss", "riscoProfit",
+    "risk_reward_ratio", "alvo_distancia",
+    "stop_distancia", "alvo_stop_ratio",
+    "entrada_stop_diff", "entrada_alvo_diff",
+    "alvo_stop_diff", "abs_profit_loss_ratio",
+    "distancia_total", "stop_pct", "alvo_pct",
+    "dayofweek", "hour", "is_weekend", "is_morning",
+    "range_trade", "spread_stop_alvo",
+    "spread_stop_entrada", "spread_alvo_entrada"
+]
+
+# Posições das colunas escalonadas na matriz de criar_features
+NUM_IDX = slice(len(CATEGORICAL_COLUMNS), len(CATEGORICAL_COLUMNS) + len(NUM_COLS))
+
+UM_DIA_NS = pd.Timedelta(days=1).value
+
+# Arrays compartilhados (somente leitura) anexados em cada worker
+_COMPARTILHADO = {}
+
+
+def carregar_dataset():
+    """Carrega trades.csv com trades fechados, ordenados por createdAt"""
+    df = pd.read_csv(CSV_PATH)
+    df = df[df["profit"].notnull() & (df["profit"] != 0)].copy()
+    df["createdAt"] = pd.to_datetime(df["createdAt"])
+    df["success"] = (df["profit"] > 10).astype(int)
+    return df.sort_values("createdAt", kind="stable").reset_index(drop=True)
+
+
+def calcular_fim_alvo(df):
+    """Momento em que o resultado do trade fica conhecido (createdAt + periodoDeAlvo)"""
+    periodo = df["periodoDeAlvo"].astype(str).str.strip()
+    partes = periodo.str.extract(r"^(\d+)\s*(hora|dia)")
+    quantidade = pd.to_numeric(partes[0], errors="coerce")
+    horas = quantidade * partes[1].map({"hora": 1, "dia": 24})
+
+    fim = df["createdAt"] + pd.to_timedelta(horas, unit="h")
+    # Alguns períodos vêm como data absoluta ("2025-09-19 18:00:00")
+    absoluto = pd.to_datetime(periodo.where(partes[0].isna()), errors="coerce")
+    fim = fim.fillna(absoluto)
+    # Sem período reconhecível: assume o embargo padrão
+    return fim.fillna(df["createdAt"] + pd.Timedelta(days=EMBARGO_DIAS))
+
+
+def criar_features(df):
+    """Cria as mesmas features de train_model.py (sem escalonar)"""
+    X = df[["ativo", "name", "tipo", "timeframe", "setup",
+            "nivelDeEntrada", "stopLoss", "nivelDeAlvo",
+            "riscoLoss", "riscoProfit"]].copy()
+
+    X["risk_reward_ratio"] = X["riscoProfit"] / (X["riscoLoss"] + 1e-6)
+    X["alvo_distancia"]   = X["nivelDeAlvo"] - X["nivelDeEntrada"]
+    X["stop_distancia"]   = X["nivelDeEntrada"] - X["stopLoss"]
+    X["alvo_stop_ratio"]  = (X["nivelDeAlvo"] - X["nivelDeEntrada"]) / (X["nivelDeEntrada"] - X["stopLoss"] + 1e-6)
+    X['entrada_stop_diff'] = X['nivelDeEntrada'] - X['stopLoss']
+    X['entrada_alvo_diff'] = X['nivelDeAlvo'] - X['nivelDeEntrada']
+    X['alvo_stop_diff'] = X['nivelDeAlvo'] - X['stopLoss']
+    X['abs_profit_loss_ratio'] = abs(X['riscoProfit']) / (abs(X['riscoLoss']) + 1e-6)
+    X['distancia_total'] = abs(X['alvo_distancia']) + abs(X['stop_distancia'])
+    X["stop_pct"] = (X["nivelDeEntrada"] - X["stopLoss"]) / X["nivelDeEntrada"]
+    X["alvo_pct"] = (X["nivelDeAlvo"] - X["nivelDeEntrada"]) / X["nivelDeEntrada"]
+    X["dayofweek"] = df["createdAt"].dt.dayofweek
+    X["hour"] = df["createdAt"].dt.hour
+    X["is_weekend"] = df["createdAt"].dt.dayofweek >= 5
+    X["is_morning"] = df["createdAt"].dt.hour.between(6, 12).astype(int)
+    X["range_trade"] = (df["nivelDeAlvo"] - df["stopLoss"]) / df["nivelDeEntrada"]
+    X["spread_stop_alvo"] = (df["nivelDeAlvo"] - df["stopLoss"])
+    X["spread_stop_entrada"] = (df["nivelDeEntrada"] - df["stopLoss"])
+    X["spread_alvo_entrada"] = (df["nivelDeAlvo"] - df["nivelDeEntrada"])
+
+    # Códigos categóricos não dependem da ordem temporal, então podem ser
+    # calculados uma vez para o dataset todo
+    for col in CATEGORICAL_COLUMNS:
+        X[col] = LabelEncoder().fit_transform(X[col].astype(str))
+
+    # Mesma ordem de colunas de train_model.py (categóricas, depois NUM_COLS)
+    return X[CATEGORICAL_COLUMNS + NUM_COLS]
+
+
+def gerar_janelas(tempos_ns):
+    """Gera janelas (inicio_treino, fim_treino, fim_teste) em índices de linha, mais o corte em ns"""
+    janelas = []
+    inicio = tempos_ns[0]
+    fim_dados = tempos_ns[-1]
+    while True:
+        corte = inicio + TREINO_DIAS * UM_DIA_NS
+        fim = corte + TESTE_DIAS * UM_DIA_NS
+        if corte > fim_dados:
+            break
+        i0, i1, i2 = np.searchsorted(tempos_ns, [inicio, corte, fim], side="left")
+        if i1 > i0 and i2 > i1:
+            janelas.append((int(i0), int(i1), int(i2), int(corte)))
+        inicio += PASSO_DIAS * UM_DIA_NS
+    return janelas
+
+
+# -------------------------------
+# Memória compartilhada
+# -------------------------------
+def _criar_compartilhado(nome, array):
+    """Copia o array para um bloco de memória compartilhada"""
+    shm = shared_memory.SharedMemory(create=True, size=array.nbytes)
+    destino = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    destino[:] = array
+    return shm, (nome, shm.name, array.shape, array.dtype.str)
+
+
+def _anexar_compartilhado(descritores):
+    """Initializer dos workers: anexa os arrays sem copiá-los"""
+    for nome, shm_name, shape, dtype in descritores:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        array.flags.writeable = False
+        # Guardar o SharedMemory junto para o buffer não ser liberado
+        _COMPARTILHADO[nome] = (shm, array)
+
+
+# -------------------------------
+# Avaliação de uma janela
+# -------------------------------
+def avaliar_janela(janela):
+    """Treina na janela de treino e avalia o teste por idade do modelo (dias)"""
+    i0, i1, i2, corte_ns = janela
+    X = _COMPARTILHADO["X"][1]
+    y = _COMPARTILHADO["y"][1]
+    tempos = _COMPARTILHADO["tempos"][1]
+    fim_alvo = _COMPARTILHADO["fim_alvo"][1]
+
+    # Purga: só treinam trades cujo resultado já era conhecido no corte
+    conhecido = (tempos[i0:i1] <= corte_ns - EMBARGO_DIAS * UM_DIA_NS) & (fim_alvo[i0:i1] <= corte_ns)
+    X_train, y_train = X[i0:i1][conhecido], y[i0:i1][conhecido]
+    X_test, y_test = X[i1:i2].copy(), y[i1:i2]
+
+    n_treino = len(y_train)
+
+    classes, contagem = np.unique(y_train, return_counts=True)
+    if len(classes) < 2:
+        return []
+
+    # Scaler ajustado só com o passado da janela e só nas NUM_COLS,
+    # como em train_model.py / avaliar_trades.py
+    scaler = StandardScaler()
+    X_train[:, NUM_IDX] = scaler.fit_transform(X_train[:, NUM_IDX])
+    X_test[:, NUM_IDX] = scaler.transform(X_test[:, NUM_IDX])
+
+    minoria = contagem.min()
+    if minoria > 1:
+        smote = SMOTE(random_state=42, k_neighbors=min(5, minoria - 1))
+        X_train, y_train = smote.fit_resample(X_train, y_train)
+
+    modelo = RandomForestClassifier(random_state=42, class_weight="balanced", n_jobs=1, **PARAMS_MODELO)
+    modelo.fit(X_train, y_train)
+    y_pred = modelo.predict(X_test)
+
+    idade_dias = (tempos[i1:i2] - corte_ns) // UM_DIA_NS
+
+    resultados = []
+    for idade in np.unique(idade_dias):
+        mask = idade_dias == idade
+        resultados.append({
+            "inicio_treino": pd.Timestamp(corte_ns - TREINO_DIAS * UM_DIA_NS),
+            "fim_treino": pd.Timestamp(corte_ns),
+            "n_treino": n_treino,
+            "n_purgados": int((~conhecido).sum()),
+            "idade_dias": int(idade),
+            "n_teste": int(mask.sum()),
+            "precision": precision_score(y_test[mask], y_pred[mask], zero_division=0),
+            "recall": recall_score(y_test[mask], y_pred[mask], zero_division=0),
+            "f1": f1_score(y_test[mask], y_pred[mask], zero_division=0),
+        })
+    return resultados
+
+
+def main():
+    inicio = time.time()
+
+    df = carregar_dataset()
+    print("✅ Dataset carregado e ordenado por createdAt!")
+    print("Formato:", df.shape)
+
+    X = np.ascontiguousarray(criar_features(df).to_numpy(dtype=np.float64))
+    y = df["success"].to_numpy(dtype=np.int8)
+    tempos = df["createdAt"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    fim_alvo = calcular_fim_alvo(df).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+    janelas = gerar_janelas(tempos)
+    print(f"🪟 {len(janelas)} janelas | treino {TREINO_DIAS}d, embargo {EMBARGO_DIAS}d, teste {TESTE_DIAS}d, passo {PASSO_DIAS}d")
+    if not janelas:
+        print("⚠️ Dados insuficientes para o walk-forward.")
+        return
+
+    blocos = []
+    try:
+        descritores = []
+        for nome, array in (("X", X), ("y", y), ("tempos", tempos), ("fim_alvo", fim_alvo)):
+            shm, descritor = _criar_compartilhado(nome, array)
+            blocos.append(shm)
+            descritores.append(descritor)
+
+        resultados = []
+        print(f"🚀 Avaliando janelas em {MAX_WORKERS} processos...")
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS, initializer=_anexar_compartilhado,
+                                 initargs=(descritores,)) as executor:
+            futures = {executor.submit(avaliar_janela, janela): janela for janela in janelas}
+            for future in as_completed(futures):
+                try:
+                    resultados.extend(future.result())
+                except Exception as e:
+                    print(f"❌ Erro na janela {futures[future]}: {e}")
+    finally:
+        for shm in blocos:
+            shm.close()
+            shm.unlink()
+
+    if not resultados:
+        print("⚠️ Nenhuma janela produziu resultados.")
+        return
+
+    res = pd.DataFrame(resultados).sort_values(["inicio_treino", "idade_dias"])
+    res.to_csv(RESULTADOS_PATH, index=False)
+
+    # Média ponderada pelo número de trades em cada idade
+    decaimento = res.groupby("idade_dias").apply(
+        lambda g: pd.Series({
+            "janelas": len(g),
+            "n_teste": g["n_teste"].sum(),
+            "precision": np.average(g["precision"], weights=g["n_teste"]),
+            "recall": np.average(g["recall"], weights=g["n_teste"]),
+            "f1": np.average(g["f1"], weights=g["n_teste"]),
+        })
+    )
+
+    print("=== Walk-forward: métricas por idade do modelo (dias) ===")
+    print(decaimento.round(3).to_string())
+    print(f"✅ Resultados por janela salvos em {RESULTADOS_PATH}")
+    print(f"⏱️ Tempo total: {time.time() - inicio:.1f}s")
+
+    plt.figure(figsize=(8,4))
+    sns.lineplot(data=res, x="idade_dias", y="precision", marker="o", label="precision")
+    sns.lineplot(data=res, x="idade_dias", y="f1", marker="o", label="f1")
+    plt.title("Decaimento do modelo com a idade (walk-forward)")
+    plt.xlabel("Idade do modelo (dias)")
+    plt.ylabel("Métrica")
+    plt.show()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import MetaTrader5 as mt5
+from collections import defaultdict
+
+# Grupos de símbolos que andam juntos; exposição no mesmo sentido soma no grupo
+GRUPOS_CORRELACAO = {
+    "indices_us": ["US500", "US30", "NAS100"],
+    "indices_eu": ["GER40", "EUSTX50", "FRA40", "UK100"],
+    "indices_asia": ["JPN225", "HK50", "AUS200", "CN50"],
+    "cripto": ["BTCUSD", "ETHUSD", "LTCUSD", "XRPUSD", "BNBUSD", "SOLUSD", "LINKUSD"],
+    "metais": ["XAUUSD", "XAGUSD"],
+    "energia": ["SpotBrent", "NatGas"],
+    "acoes_us": ["NVDA.US", "AMZN.US", "META.US", "MSFT.US", "AAPL.US", "AMD.US",
+                 "NFLX.US", "TSLA.US", "AVGO.US", "INTC.US"],
+}
+
+LIMITES_PADRAO = {
+    "por_moeda": 100.0,
+    "por_simbolo": 40.0,
+    "por_grupo": 60.0,
+    "total": 300.0,
+}
+
+BUY_TYPES = (mt5.ORDER_TYPE_BUY, mt5.ORDER_TYPE_BUY_LIMIT, mt5.ORDER_TYPE_BUY_STOP, mt5.ORDER_TYPE_BUY_STOP_LIMIT)
+
+
+class ExposureIndex:
+    """Índice de risco líquido por moeda, símbolo e grupo de correlação.
+
+    Carregado de um snapshot de positions_get/orders_get, atualizado a cada
+    ordem enviada (add) e reconciliado uma vez por ciclo (sync), para que a
+    checagem pré-trade não consulte o terminal.
+    """
+
+    def __init__(self, logger, limites=None, grupos=GRUPOS_CORRELACAO, risco_sem_stop=20.0):
+        self.logger = logger
+        self.limites = {**LIMITES_PADRAO, **(limites or {})}
+        self.risco_sem_stop = risco_sem_stop
+
+        # Pré-computado: símbolo → grupo
+        self.grupo_por_simbolo = {s: g for g, simbolos in grupos.items() for s in simbolos}
+
+        self._moedas = {}
+        self._reset()
+
+    def _reset(self):
+        self.por_moeda = defaultdict(float)
+        self.por_simbolo = defaultdict(float)
+        self.por_grupo = defaultdict(float)
+        self.total = 0.0
+        self.tickets = {}
+
+    # -------------------------------
+    # Decomposição do símbolo
+    # -------------------------------
+    def preload_currencies(self, symbols):
+        """Preenche o cache símbolo → moedas antes das checagens (fora do caminho pré-trade)"""
+        for symbol in symbols:
+            if symbol not in self._moedas:
+                info = mt5.symbol_info(symbol)
+                if info:
+                    self._moedas[symbol] = (info.currency_base, info.currency_profit)
+                elif len(symbol) == 6:
+                    self._moedas[symbol] = (symbol[:3], symbol[3:])
+                else:
+                    self._moedas[symbol] = (None, None)
+
+    def currencies(self, symbol):
+        """Retorna (moeda_base, moeda_lucro) do cache; preload_currencies preenche"""
+        if symbol not in self._moedas:
+            self.preload_currencies([symbol])
+        return self._moedas[symbol]
+
+    def _contribuicoes(self, symbol, sinal):
+        """Lista de (bucket, chave, sinal) afetados por uma posição no símbolo"""
+        base, lucro = self.currencies(symbol)
+        itens = [(self.por_simbolo, symbol, sinal)]
+        if base and lucro and base != lucro:
+            # Compra de EURUSD: comprado em EUR, vendido em USD
+            itens.append((self.por_moeda, base, sinal))
+            itens.append((self.por_moeda, lucro, -sinal))
+        elif lucro or base:
+            itens.append((self.por_moeda, lucro or base, sinal))
+        grupo = self.grupo_por_simbolo.get(symbol)
+        if grupo:
+            itens.append((self.por_grupo, grupo, sinal))
+        return itens
+
+    def _limite(self, bucket):
+        if bucket is self.por_moeda:
+            return self.limites["por_moeda"]
+        if bucket is self.por_simbolo:
+            return self.limites["por_simbolo"]
+        return self.limites["por_grupo"]
+
+    # -------------------------------
+    # Carga e atualização
+    # -------------------------------
+    def _snapshot(self):
+        """Lê posições e ordens em massa: {ticket: (símbolo, tipo, args de _risco_snapshot)}.
+
+        Os args (tipo, volume, preço, sl) também servem de assinatura do ticket.
+        """
+        positions = mt5.positions_get() or ()
+        orders = mt5.orders_get() or ()
+        self.preload_currencies({p.symbol for p in positions} | {o.symbol for o in orders})
+
+        atuais = {}
+        for p in positions:
+            tipo = 'compra' if p.type == mt5.POSITION_TYPE_BUY else 'venda'
+            atuais[p.ticket] = (p.symbol, tipo, (p.type, p.volume, p.price_open, p.sl))
+
+        for o in orders:
+            tipo = 'compra' if o.type in BUY_TYPES else 'venda'
+            order_type = mt5.ORDER_TYPE_BUY if tipo == 'compra' else mt5.ORDER_TYPE_SELL
+            atuais[o.ticket] = (o.symbol, tipo, (order_type, o.volume_current, o.price_open, o.sl))
+        return atuais, len(positions), len(orders)
+
+    def load_snapshot(self):
+        """Carrega o índice do zero a partir de uma única leitura de posições e ordens"""
+        atuais, n_positions, n_orders = self._snapshot()
+        self._reset()
+        for ticket, (symbol, tipo, args) in atuais.items():
+            self.add(ticket, symbol, tipo, self._risco_snapshot(symbol, *args), assinatura=args)
+
+        self.logger.info(
+            f"📊 Exposição carregada: {n_positions} posições, {n_orders} ordens | risco total {self.total:.2f}"
+        )
+
+    def sync(self):
+        """Reconcilia o índice com o terminal aplicando só a diferença.
+
+        Tickets que sumiram (fechados, cancelados, executados, stop/alvo
+        atingidos, ou simulados no dry-run) saem via remove; tickets novos
+        entram via add. Tickets cuja assinatura (volume, preço, sl) mudou são
+        recalculados com remove + add: fechamento parcial, sl movido ou, em
+        conta netting, ordem pendente executada num símbolo que já tem
+        posição (a ordem some e a posição existente aumenta de volume,
+        mantendo o ticket). Ordens recém-enviadas não têm assinatura e são
+        recalculadas com os dados do terminal no primeiro sync.
+        """
+        atuais, _, _ = self._snapshot()
+        removidos = [t for t in self.tickets if t not in atuais]
+        for ticket in removidos:
+            self.remove(ticket)
+
+        novos = alterados = 0
+        for ticket, (symbol, tipo, args) in atuais.items():
+            registro = self.tickets.get(ticket)
+            if registro is not None:
+                if registro[3] == args:
+                    continue
+                self.remove(ticket)
+                alterados += 1
+            else:
+                novos += 1
+            self.add(ticket, symbol, tipo, self._risco_snapshot(symbol, *args), assinatura=args)
+
+        if removidos or novos or alterados:
+            self.logger.info(
+                f"📊 Exposição sincronizada: -{len(removidos)} / +{novos} / ~{alterados} tickets | "
+                f"risco total {self.total:.2f}"
+            )
+
+    def _risco_snapshot(self, symbol, order_type, volume, price_open, sl):
+        if not sl:
+            return self.risco_sem_stop
+        profit = mt5.order_calc_profit(order_type, symbol, volume, price_open, sl)
+        if profit is None:
+            return self.risco_sem_stop
+        # Stop no breakeven ou já no lucro não representa risco
+        return max(0.0, -profit)
+
+    def add(self, ticket, symbol, trade_type, risco, assinatura=None):
+        """Registra uma ordem/posição nova; assinatura vem do snapshot (None para ordens enviadas)"""
+        if ticket in self.tickets:
+            return
+        sinal = 1 if trade_type.lower() == 'compra' else -1
+        for bucket, chave, s in self._contribuicoes(symbol, sinal):
+            bucket[chave] += s * risco
+        self.total += risco
+        self.tickets[ticket] = (symbol, sinal, risco, assinatura)
+
+    def remove(self, ticket):
+        """Remove uma ordem cancelada ou posição fechada"""
+        registro = self.tickets.pop(ticket, None)
+        if not registro:
+            return
+        symbol, sinal, risco, _ = registro
+        for bucket, chave, s in self._contribuicoes(symbol, sinal):
+            bucket[chave] -= s * risco
+        self.total -= risco
+
+    # -------------------------------
+    # Checagem pré-trade (O(1))
+    # -------------------------------
+    def headroom(self, symbol, trade_type):
+        """Maior risco que cabe nos limites para um novo trade neste sentido"""
+        sinal = 1 if trade_type.lower() == 'compra' else -1
+        folga = self.limites["total"] - self.total
+        for bucket, chave, s in self._contribuicoes(symbol, sinal):
+            atual = bucket[chave]
+            limite = self._limite(bucket)
+            # Trade no sentido oposto reduz a exposição antes de aumentá-la
+            folga = min(folga, limite - atual * s)
+        return max(0.0, folga)
+
+    def check(self, symbol, trade_type, risco, risco_minimo=5.0):
+        """Retorna o risco permitido (risco, reduzido, ou 0 se rejeitado)"""
+        folga = self.headroom(symbol, trade_type)
+        if folga >= risco:
+            return risco
+        if folga >= risco_minimo:
+            return folga
+        return 0.0
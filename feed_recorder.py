@@ -0,0 +1,99 @@
+import os
+import gzip
+import json
+import time
+import zlib
+import struct
+import threading
+from datetime import datetime
+
+JOURNAL_DIR = "feed_journal"
+
+# Cada registro: MAGIC + tamanho (uint32 little-endian) + página em gzip
+MAGIC = b"FJR1"
+CABECALHO = struct.Struct("<4sI")
+
+
+class FeedRecorder:
+    """Grava cada página crua do Autochartist, comprimida e com timestamp, no journal do dia"""
+
+    def __init__(self, logger=None, journal_dir=JOURNAL_DIR):
+        self.logger = logger
+        self.journal_dir = journal_dir
+        self._lock = threading.Lock()
+        os.makedirs(journal_dir, exist_ok=True)
+
+    def journal_path(self, ts=None):
+        """Um arquivo por dia: feed_journal/AAAA-MM-DD.journal"""
+        dia = datetime.fromtimestamp(ts or time.time()).strftime("%Y-%m-%d")
+        return os.path.join(self.journal_dir, f"{dia}.journal")
+
+    def gravar(self, page, page_offset=None, ciclo=None):
+        """Grava uma página; chamado em paralelo pelas threads do fetch"""
+        ts = time.time()
+        registro = {
+            "ts": ts,
+            "ciclo": ciclo if ciclo is not None else ts,
+            "page_offset": page_offset,
+            "page": page,
+        }
+        dados = gzip.compress(json.dumps(registro, ensure_ascii=False).encode("utf-8"))
+
+        # O cabeçalho com tamanho permite ao leitor pular um registro cortado
+        # (queda no meio da escrita) e continuar no próximo, mesmo que o
+        # arquivo do dia tenha recebido mais registros depois de um reinício
+        bloco = CABECALHO.pack(MAGIC, len(dados)) + dados
+        try:
+            with self._lock:
+                with open(self.journal_path(ts), "ab") as f:
+                    f.write(bloco)
+        except OSError as e:
+            if self.logger:
+                self.logger.error(f"Erro ao gravar journal do feed: {e}")
+
+
+def _ler_registros(conteudo):
+    """Decodifica os registros de um journal; retorna (registros, corrompidos)"""
+    registros = []
+    corrompidos = 0
+    pos = 0
+    while pos + CABECALHO.size <= len(conteudo):
+        magic, tamanho = CABECALHO.unpack_from(conteudo, pos)
+        inicio = pos + CABECALHO.size
+        if magic == MAGIC and inicio + tamanho <= len(conteudo):
+            try:
+                dados = gzip.decompress(conteudo[inicio:inicio + tamanho])
+                registros.append(json.loads(dados.decode("utf-8")))
+                pos = inicio + tamanho
+                continue
+            except (EOFError, OSError, zlib.error, UnicodeDecodeError, json.JSONDecodeError):
+                pass
+
+        # Registro danificado: procurar o próximo cabeçalho
+        corrompidos += 1
+        proximo = conteudo.find(MAGIC, pos + 1)
+        if proximo < 0:
+            break
+        pos = proximo
+
+    if pos < len(conteudo) and pos + CABECALHO.size > len(conteudo):
+        # Sobra menor que um cabeçalho no fim do arquivo
+        corrompidos += 1
+    return registros, corrompidos
+
+
+def ler_journal(paths, logger=None):
+    """Lê registros de um ou mais journals, em ordem de timestamp"""
+    if isinstance(paths, str):
+        paths = [paths]
+
+    registros = []
+    for path in paths:
+        with open(path, "rb") as f:
+            lidos, corrompidos = _ler_registros(f.read())
+        registros.extend(lidos)
+        if corrompidos and logger:
+            logger.warning(f"⚠️ {path}: {corrompidos} registro(s) corrompido(s) ignorado(s), {len(lidos)} lidos")
+
+    registros.sort(key=lambda r: r["ts"])
+    return registros
@@ -4,9 +4,25 @@ import json
 import os
 from mt5 import TradeManager
 from trade_ideas import get_trades_ideas
+from feed_recorder import FeedRecorder
 
 HISTORICO_JSON = "trades_processados.json"
 
+# Conexão MT5 (compartilhada com replay.py); variáveis de ambiente sobrescrevem
+MT5_CONFIG = {
+    "mt5_path": os.environ.get("MT5_PATH", "C:/Program Files/MetaTrader 5 - IA/terminal64.exe"),
+    # login=61410395,
+    # password="bkshe2Lqc(",
+    "login": int(os.environ.get("MT5_LOGIN", 61408587)),
+    "password": os.environ.get("MT5_PASSWORD", "T&ster123!"),
+    "server": os.environ.get("MT5_SERVER", "Pepperstone-Demo"),
+}
+THRESHOLD = 0.6
+
+def criar_trade_manager(logger, **kwargs):
+    """Cria o TradeManager com a conexão e o threshold padrão"""
+    return TradeManager(logger=logger, threshold=THRESHOLD, **MT5_CONFIG, **kwargs)
+
 def carregar_historico():
     """Carrega trades já processados do JSON"""
     if os.path.exists(HISTORICO_JSON):
@@ -27,17 +43,11 @@ def main():
     # Carregar histórico
     trades_processados = carregar_historico()
 
+    # Gravar páginas cruas do feed para replay/testes de carga
+    recorder = FeedRecorder(logger=logger)
+
     # Inicializar conexão MT5
-    tm = TradeManager(
-        logger=logger,
-        mt5_path="C:/Program Files/MetaTrader 5 - IA/terminal64.exe",
-        # login=61410395,
-        # password="bkshe2Lqc(",
-        login=61408587,
-        password="T&ster123!",
-        server="Pepperstone-Demo",
-        threshold=0.6
-    )
+    tm = criar_trade_manager(logger)
 
     if not tm.connected:
         logger.error("❌ Não foi possível conectar ao MT5")
@@ -47,11 +57,14 @@ def main():
         logger.info("🔄 Buscando novos trades...")
 
         # Buscar trades do TradeIdeas
-        trades = get_trades_ideas()
+        trades = get_trades_ideas(recorder=recorder)
 
         if not trades:
             logger.info("⚠️ Nenhum trade disponível.")
         else:
+            # Reconciliar exposição uma vez por ciclo (fechamentos, stops, cancelamentos)
+            tm.prepare_cycle({trade["Ativo"] for trade in trades})
+
             for trade in trades:
                 trade_id = trade["Id"]
 
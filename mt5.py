@@ -1,10 +1,14 @@
+import itertools
 import MetaTrader5 as mt5
+from exposure import ExposureIndex
 from IA.avaliar_trades import carregar_modelo, avaliar_trade
 
 class TradeManager:
-    def __init__(self, logger, mt5_path=None, login=None, password=None, server=None, threshold=0.5):
+    def __init__(self, logger, mt5_path=None, login=None, password=None, server=None, threshold=0.5, dry_run=False, limites_exposicao=None):
         self.logger = logger
         self.threshold = threshold
+        # dry_run: calcula tudo mas não envia ordens (usado no replay)
+        self.dry_run = dry_run
 
         if mt5_path:
             if not mt5.initialize(path=mt5_path):
@@ -31,6 +35,11 @@ class TradeManager:
         # Carregar modelo IA
         self.modelo, self.encoders, self.scaler = carregar_modelo()
 
+        # Índice de exposição: um snapshot agora, depois atualizado a cada ordem
+        self.exposure = ExposureIndex(self.logger, limites=limites_exposicao)
+        self.exposure.load_snapshot()
+        self._dry_run_tickets = itertools.count(1)
+
     # -------------------------------
     # Fechar conexão com MT5
     # -------------------------------
@@ -39,6 +48,14 @@ class TradeManager:
         self.connected = False
         self.logger.info("🔌 Conexão com MT5 encerrada.")
 
+    # -------------------------------
+    # Exposição por ciclo
+    # -------------------------------
+    def prepare_cycle(self, symbols):
+        """Reconcilia a exposição e carrega as moedas dos símbolos do lote, uma vez por ciclo"""
+        self.exposure.sync()
+        self.exposure.preload_currencies(symbols)
+
     # -------------------------------
     # Utilitários
     # -------------------------------
@@ -210,36 +227,67 @@ class TradeManager:
             if not lot_result:
                 return None
 
-            lot_size = lot_result['lote']
-            current_price = self.get_current_price(symbol, trade_type)
-            if not current_price:
-                return None
-
-            # Tipo de ordem
-            if trade_type.lower() == 'compra':
-                order_type = mt5.ORDER_TYPE_BUY_STOP if entry_price > current_price else mt5.ORDER_TYPE_BUY_LIMIT
-            else:
-                order_type = mt5.ORDER_TYPE_SELL_STOP if entry_price < current_price else mt5.ORDER_TYPE_SELL_LIMIT
-
-            request = {
-                "action": mt5.TRADE_ACTION_PENDING,
-                "symbol": symbol,
-                "volume": lot_size,
-                "type": order_type,
-                "price": entry_price,
-                "sl": stop_loss,
-                "tp": take_profit,
-                "deviation": 20,
-                "magic": 777777,
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_RETURN,
-                "comment": f"{prob_sucesso:.1f}%",
-            }
-
-            result = mt5.order_send(request)
-            if result and result.retcode == mt5.TRADE_RETCODE_DONE:
-                return {'order': result.order, 'risco_loss': lot_result['riscoLoss'], 'risco_profit': lot_result['riscoProfit']}
-            return None
+            return self._send_checked_order(symbol, trade_type, entry_price, stop_loss, take_profit, prob_sucesso, lot_result)
         except Exception as e:
             self.logger.error(f"Erro em ordem pendente {symbol}: {e}")
             return None
+
+    def _send_checked_order(self, symbol, trade_type, entry_price, stop_loss, take_profit, prob_sucesso, lot_result):
+        """Aplica os limites de exposição (aceita, reduz ou rejeita) e envia a ordem"""
+        risco = lot_result['riscoLoss']
+        if risco <= 0:
+            # calculate_risk devolve 0.0 quando não consegue calcular: cobra o risco padrão
+            risco = self.exposure.risco_sem_stop
+            self.logger.warning(f"⚠️ Risco de {symbol} indisponível, contando {risco:.2f} na exposição")
+
+        risco_permitido = self.exposure.check(symbol, trade_type, risco)
+        if not risco_permitido:
+            self.logger.warning(f"⛔ Limite de exposição atingido para {symbol} ({trade_type})")
+            return None
+
+        if risco_permitido < risco:
+            lot_result = self.calculate_normalized_lot(symbol, trade_type, entry_price, stop_loss, take_profit, risco_alvo=risco_permitido)
+            if not lot_result:
+                return None
+            risco = lot_result['riscoLoss'] if lot_result['riscoLoss'] > 0 else risco_permitido
+            if risco > self.exposure.headroom(symbol, trade_type):
+                self.logger.warning(f"⛔ Lote mínimo de {symbol} excede a folga de exposição {risco_permitido:.2f}")
+                return None
+            self.logger.info(f"✂️ Risco de {symbol} reduzido para {risco:.2f} pelos limites de exposição")
+
+        lot_size = lot_result['lote']
+        current_price = self.get_current_price(symbol, trade_type)
+        if not current_price:
+            return None
+
+        # Tipo de ordem
+        if trade_type.lower() == 'compra':
+            order_type = mt5.ORDER_TYPE_BUY_STOP if entry_price > current_price else mt5.ORDER_TYPE_BUY_LIMIT
+        else:
+            order_type = mt5.ORDER_TYPE_SELL_STOP if entry_price < current_price else mt5.ORDER_TYPE_SELL_LIMIT
+
+        request = {
+            "action": mt5.TRADE_ACTION_PENDING,
+            "symbol": symbol,
+            "volume": lot_size,
+            "type": order_type,
+            "price": entry_price,
+            "sl": stop_loss,
+            "tp": take_profit,
+            "deviation": 20,
+            "magic": 777777,
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_RETURN,
+            "comment": f"{prob_sucesso:.1f}%",
+        }
+
+        if self.dry_run:
+            self.logger.debug(f"[dry-run] Ordem não enviada: {request}")
+            self.exposure.add(-next(self._dry_run_tickets), symbol, trade_type, risco)
+            return {'order': None, 'risco_loss': lot_result['riscoLoss'], 'risco_profit': lot_result['riscoProfit']}
+
+        result = mt5.order_send(request)
+        if result and result.retcode == mt5.TRADE_RETCODE_DONE:
+            self.exposure.add(result.order, symbol, trade_type, risco)
+            return {'order': result.order, 'risco_loss': lot_result['riscoLoss'], 'risco_profit': lot_result['riscoProfit']}
+        return None
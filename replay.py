@@ -0,0 +1,259 @@
+import glob
+import time
+import queue
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from trade_ideas import get_trades_ideas
+from feed_recorder import JOURNAL_DIR, ler_journal
+from main import criar_trade_manager
+
+FIM = object()
+
+
+class NovoCiclo:
+    """Marca o início de um ciclo na fila de trades"""
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+
+
+class JournalFetcher:
+    """Substitui fetch_page: devolve as páginas gravadas de um ciclo"""
+
+    def __init__(self, paginas, volume=1):
+        self.paginas = paginas
+        self.volume = volume
+        self.servidas = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url, page_offset=None, recorder=None, ciclo=None):
+        page = self.paginas[page_offset]
+        with self._lock:
+            self.servidas += 1
+        if self.volume <= 1:
+            return page
+        return {**page, "items": self._multiplicar(page.get("items", []))}
+
+    def _multiplicar(self, items):
+        """Clona cada item volume vezes com result_uid sintético"""
+        clones = []
+        for item in items:
+            clones.append(item)
+            for k in range(1, self.volume):
+                data = dict(item["data"])
+                data["result_uid"] = f"{data['result_uid']}-{k}"
+                clones.append({**item, "data": data})
+        return clones
+
+
+def agrupar_ciclos(registros):
+    """Agrupa as páginas gravadas por ciclo: [(ciclo_ts, {page_offset: página})]"""
+    ciclos = defaultdict(dict)
+    for registro in registros:
+        ciclos[registro["ciclo"]][registro["page_offset"]] = registro["page"]
+    return sorted(ciclos.items())
+
+
+class ReplayDriver:
+    """Reproduz um journal pelo caminho completo fetch → IA → lote → ordem.
+
+    Cada ciclo gravado passa por get_trades_ideas (paginação e pool de
+    threads reais) com um JournalFetcher no lugar do HTTP. speed=10 reproduz
+    10x mais rápido que a gravação (0 = sem espera) e volume=N multiplica cada
+    ideia N vezes com ids sintéticos. O estágio de ordens roda em uma única
+    thread: o pacote MetaTrader5 não é thread-safe.
+    """
+
+    def __init__(self, tm, logger, registros, speed=1.0, volume=1, fila_max=100):
+        self.tm = tm
+        self.logger = logger
+        self.registros = registros
+        self.ciclos = agrupar_ciclos(registros)
+        self.speed = speed
+        self.volume = volume
+        self.fila_ciclos = queue.Queue(maxsize=fila_max)
+        self.fila_trades = queue.Queue(maxsize=fila_max)
+
+        self._processados = set()
+        self.stats = {
+            "ciclos": 0,
+            "paginas": 0,
+            "trades": 0,
+            "duplicados": 0,
+            "aprovados": 0,
+            "rejeitados": 0,
+            "erros": 0,
+            "bloqueio_ciclos_s": 0.0,
+            "bloqueio_trades_s": 0.0,
+            "atraso_max_s": 0.0,
+            "fila_ciclos_max": 0,
+            "fila_trades_max": 0,
+            "amostras_fila": [],
+        }
+
+    # -------------------------------
+    # Estágios do pipeline
+    # -------------------------------
+    def _produzir(self):
+        """Entrega os ciclos respeitando o tempo original dividido por speed"""
+        t0_journal = self.ciclos[0][0]
+        t0 = time.monotonic()
+
+        for ciclo, paginas in self.ciclos:
+            if self.speed > 0:
+                alvo = t0 + (ciclo - t0_journal) / self.speed
+                espera = alvo - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+                else:
+                    # Replay atrasado em relação ao relógio acelerado
+                    self.stats["atraso_max_s"] = max(self.stats["atraso_max_s"], -espera)
+
+            inicio = time.monotonic()
+            self.fila_ciclos.put(paginas)
+            self.stats["bloqueio_ciclos_s"] += time.monotonic() - inicio
+
+        self.fila_ciclos.put(FIM)
+
+    def _buscar(self):
+        """Estágio de fetch: get_trades_ideas sobre as páginas do journal"""
+        while True:
+            paginas = self.fila_ciclos.get()
+            if paginas is FIM:
+                break
+            self.stats["ciclos"] += 1
+            fetcher = JournalFetcher(paginas, self.volume)
+            try:
+                trades = get_trades_ideas(fetch=fetcher)
+            except Exception as e:
+                self.logger.error(f"Erro ao buscar ciclo do journal: {e}")
+                continue
+            finally:
+                self.stats["paginas"] += fetcher.servidas
+
+            # Como em main.py: exposição reconciliada uma vez por ciclo, o que
+            # também descarta a exposição simulada pelo dry-run no ciclo anterior
+            for item in [NovoCiclo({trade["Ativo"] for trade in trades})] + trades:
+                inicio = time.monotonic()
+                self.fila_trades.put(item)
+                self.stats["bloqueio_trades_s"] += time.monotonic() - inicio
+
+        self.fila_trades.put(FIM)
+
+    def _executar(self):
+        """Estágio de IA, lote e ordem (TradeManager.send_order)"""
+        while True:
+            trade = self.fila_trades.get()
+            if trade is FIM:
+                break
+            if isinstance(trade, NovoCiclo):
+                self.tm.prepare_cycle(trade.symbols)
+                continue
+
+            if trade["Id"] in self._processados:
+                self.stats["duplicados"] += 1
+                continue
+            self._processados.add(trade["Id"])
+
+            resultado = self.tm.send_order(trade)
+
+            self.stats["trades"] += 1
+            if resultado is None:
+                self.stats["erros"] += 1
+            elif resultado.get("success"):
+                self.stats["aprovados"] += 1
+            else:
+                self.stats["rejeitados"] += 1
+
+    def _monitorar(self, parar, intervalo=0.5):
+        """Amostra a profundidade das filas para medir back-pressure"""
+        while not parar.wait(intervalo):
+            ciclos, trades = self.fila_ciclos.qsize(), self.fila_trades.qsize()
+            self.stats["fila_ciclos_max"] = max(self.stats["fila_ciclos_max"], ciclos)
+            self.stats["fila_trades_max"] = max(self.stats["fila_trades_max"], trades)
+            self.stats["amostras_fila"].append((ciclos, trades))
+
+    # -------------------------------
+    # Execução
+    # -------------------------------
+    def run(self):
+        if not self.ciclos:
+            self.logger.warning("⚠️ Journal vazio, nada para reproduzir.")
+            return self.stats
+
+        parar = threading.Event()
+        monitor = threading.Thread(target=self._monitorar, args=(parar,), daemon=True)
+        threads = [threading.Thread(target=self._produzir), threading.Thread(target=self._buscar),
+                   threading.Thread(target=self._executar)]
+
+        inicio = time.monotonic()
+        monitor.start()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        parar.set()
+        monitor.join()
+
+        self.stats["duracao_s"] = time.monotonic() - inicio
+        return self.stats
+
+    def relatorio(self):
+        s = self.stats
+        duracao = s.get("duracao_s", 0) or 1e-9
+        amostras = s["amostras_fila"] or [(0, 0)]
+        gravado = self.registros[-1]["ts"] - self.registros[0]["ts"] if self.registros else 0
+
+        self.logger.info("=== Replay do feed ===")
+        self.logger.info(f"Speed {self.speed}x | Volume {self.volume}x")
+        self.logger.info(f"Duração gravada: {gravado:.1f}s | Duração do replay: {duracao:.1f}s")
+        self.logger.info(
+            f"Ciclos: {s['ciclos']} | Páginas: {s['paginas']} | Trades: {s['trades']} (aprovados {s['aprovados']}, "
+            f"rejeitados {s['rejeitados']}, erros {s['erros']}, duplicados {s['duplicados']})"
+        )
+        self.logger.info(f"📈 Throughput sustentado: {s['ciclos']/duracao:.2f} ciclos/s | {s['paginas']/duracao:.2f} páginas/s | {s['trades']/duracao:.2f} trades/s")
+        self.logger.info(
+            f"📦 Fila de ciclos: máx {s['fila_ciclos_max']}, média {sum(a[0] for a in amostras)/len(amostras):.1f} | "
+            f"Fila de trades: máx {s['fila_trades_max']}, média {sum(a[1] for a in amostras)/len(amostras):.1f}"
+        )
+        self.logger.info(
+            f"⛔ Back-pressure: produtor bloqueado {s['bloqueio_ciclos_s']:.1f}s, "
+            f"fetch bloqueado {s['bloqueio_trades_s']:.1f}s, atraso máx {s['atraso_max_s']:.1f}s"
+        )
+        if s["atraso_max_s"] > 1.0:
+            self.logger.warning("⚠️ Pipeline saturado: o replay não acompanhou a velocidade pedida.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay acelerado do journal do feed")
+    parser.add_argument("journal", nargs="*", help=f"Arquivos .journal (padrão: todos em {JOURNAL_DIR}/)")
+    parser.add_argument("--speed", type=float, default=10.0, help="Aceleração (0 = o mais rápido possível)")
+    parser.add_argument("--volume", type=int, default=1, help="Multiplicador sintético de ideias")
+    parser.add_argument("--fila-max", type=int, default=100, help="Tamanho máximo de cada fila")
+    parser.add_argument("--enviar", action="store_true", help="Envia ordens de verdade (padrão: dry-run)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger("Replay")
+
+    paths = args.journal or sorted(glob.glob(f"{JOURNAL_DIR}/*.journal"))
+    registros = ler_journal(paths, logger=logger)
+    logger.info(f"📼 {len(registros)} páginas carregadas de {len(paths)} journal(s)")
+
+    tm = criar_trade_manager(logger, dry_run=not args.enviar)
+
+    if not tm.connected:
+        logger.error("❌ Não foi possível conectar ao MT5")
+        return
+
+    driver = ReplayDriver(tm, logger, registros, speed=args.speed, volume=args.volume,
+                          fila_max=args.fila_max)
+    driver.run()
+    driver.relatorio()
+
+    tm.shutdown()
+
+if __name__ == "__main__":
+    main()
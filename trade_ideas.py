@@ -4,13 +4,51 @@ import requests
 import concurrent.futures
 from typing import Dict, Any
 
-def fetch_page(url: str, page_offset: int = None) -> Dict[str, Any]:
+def fetch_page(url: str, page_offset: int = None, recorder=None, ciclo: float = None) -> Dict[str, Any]:
     if page_offset is not None:
         url = f"{url}&page_offset={page_offset}"
     response = requests.get(url)
-    return response.json()
+    data = response.json()
+    if recorder is not None:
+        recorder.gravar(data, page_offset=page_offset, ciclo=ciclo)
+    return data
+
+def parse_trades(trades):
+    """Converte os itens crus do Autochartist no formato usado pelo TradeManager"""
+    analises_tecnicas = []
+
+    for trade in trades:
+        chart_image = next((link['href'] for link in trade['links'] if link['rel'] == 'chart-xs'), None)
+        
+        analise = {
+            "Id": str(trade['data']['result_uid']),
+            "Ativo": trade['data']['symbol'],
+            "Name": trade['data']['symbol_name'],
+            "Tipo":'compra' if trade['data']['direction'] == 1 else 'venda',
+            "Timeframe": trade['data']['interval'],
+            "Setup": trade['data']['pattern'],
+            "Identificadoem": trade['data']['identified'],
+            "Análise": trade['data']['analysis_text'],
+            "NíveldeEntrada": trade['data']['signal_levels']['entry_level'],
+            "StopLoss": trade['data']['signal_levels']['stop_loss'],
+            "filePath": chart_image,
+            "NíveldeAlvo": trade['data']['signal_levels']['target_level'],
+            "PeríododeAlvo": trade['data']['signal_levels']['target_period'],
+            "Tipo de Mercado": "Internacional",
+            "UserId": "BlackBots - Trade Ideas",
+        }
+        analises_tecnicas.append(analise)
+
+    return analises_tecnicas
+
+def get_trades_ideas(recorder=None, fetch=fetch_page):
+    """Busca todas as páginas de ideias; se houver recorder, grava cada página crua.
+
+    fetch pode ser trocado (ex.: páginas de um journal no replay) mantendo a
+    mesma paginação e o mesmo pool de threads.
+    """
+    ciclo = time.time()
 
-def get_trades_ideas():
     expiry = int(time.time()) + (3 * 24 * 60 * 60)
     
     userid = "BlackBots"  
@@ -23,7 +61,7 @@ def get_trades_ideas():
     
     base_url = f"https://component.autochartist.com/to/resources/results?account_type=LIVE&broker_id=958&token={token}&expire={expiry}&user=BlackBots&locale=pt-BR"
     
-    first_page_data = fetch_page(base_url)
+    first_page_data = fetch(base_url, recorder=recorder, ciclo=ciclo)
     
     page_info = first_page_data.get('page', {})
     total_pages = page_info.get('total_pages', 1)
@@ -37,7 +75,7 @@ def get_trades_ideas():
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=min(10, total_pages-1)) as executor:
             future_to_page = {
-                executor.submit(fetch_page, base_url, offset): offset 
+                executor.submit(fetch, base_url, offset, recorder, ciclo): offset 
                 for offset in page_offsets
             }
             
@@ -49,33 +87,7 @@ def get_trades_ideas():
                 except Exception:
                     pass
     
-    trades = all_trades
-    
-    analises_tecnicas = []
-
-    for trade in trades:
-        chart_image = next((link['href'] for link in trade['links'] if link['rel'] == 'chart-xs'), None)
-        
-        analise = {
-            "Id": str(trade['data']['result_uid']),
-            "Ativo": trade['data']['symbol'],
-            "Name": trade['data']['symbol_name'],
-            "Tipo":'compra' if trade['data']['direction'] == 1 else 'venda',
-            "Timeframe": trade['data']['interval'],
-            "Setup": trade['data']['pattern'],
-            "Identificadoem": trade['data']['identified'],
-            "Análise": trade['data']['analysis_text'],
-            "NíveldeEntrada": trade['data']['signal_levels']['entry_level'],
-            "StopLoss": trade['data']['signal_levels']['stop_loss'],
-            "filePath": chart_image,
-            "NíveldeAlvo": trade['data']['signal_levels']['target_level'],
-            "PeríododeAlvo": trade['data']['signal_levels']['target_period'],
-            "Tipo de Mercado": "Internacional",
-            "UserId": "BlackBots - Trade Ideas",
-        }
-        analises_tecnicas.append(analise)
-
-    return analises_tecnicas
+    return parse_trades(all_trades)
 
 class TradeIdeas:
     """Classe para gerenciar trades do sistema TradeIdeas"""